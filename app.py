@@ -6,6 +6,16 @@ import threading
 import time  # Importing time for countdown functionality
 import sys
 import sqlite3
+import logging
+import atexit
+from collections import deque
+from setup_database import create_database, db_path, get_model_names, model_folder, script_dir
+
+log = logging.getLogger(__name__)
+
+# Helper scripts live next to this one, in script_dir
+convert_script_path = os.path.join(script_dir, "feature_convert_shp.py")
+annotate_script_path = os.path.join(script_dir, "feature_save_annotated_file.py")
 
 # Variables to hold the IDs for displaying the selected folder path and buttons
 folder_path_id = None
@@ -13,7 +23,6 @@ select_folder_button_id = None
 convert_button_id = None  # This button will be hidden initially
 success_message_id = None
 conversion_message_id = None
-model_folder = ''
 timer_running = False
 start_time = 0
 final_time = 0
@@ -21,28 +30,93 @@ total_processed = 0
 total_file_tiff = 0
 total_abnormal = 0
 total_normal = 0
+# Log lines are buffered per text item and pushed to the widget at most once per interval
+LOG_FLUSH_INTERVAL = 0.05
+ACTIVITY_LOG_MAX_LINES = 1000  # Oldest lines are dropped beyond this
+log_buffers = {}
+last_log_flush = {}
+log_flush_pending = set()  # Log ids with a trailing flush already armed
+log_lock = threading.Lock()  # Worker and trailing-flush timer threads share the buffers
+
+# Selected folder -> mtime_ns of the last scan that found .tif files
+folder_scan_cache = {}
+
+# Configuration columns, in the order the queries below list them
+CONFIG_COLUMNS = (
+    "model", "imgsz", "iou", "conf", "convert_shp", "convert_kml",
+    "max_det", "line_width", "show_labels", "show_conf", "status_blok",
+)
+# SQL derived from CONFIG_COLUMNS so the column list is written in one place
+LOAD_CONFIG_SQL = f"SELECT {', '.join(CONFIG_COLUMNS)} FROM configuration ORDER BY id DESC LIMIT 1"
+# Overwrite the current row instead of appending a new one on every save
+SAVE_CONFIG_SQL = (
+    f"UPDATE configuration SET {', '.join(f'{column} = ?' for column in CONFIG_COLUMNS)} "
+    "WHERE id = (SELECT MAX(id) FROM configuration)"
+)
+
 # Function to update the timer label
 def update_timer():
+    last_text = None
     while timer_running:
         elapsed_time = time.time() - start_time
         if elapsed_time < 60:
             # Show only seconds if under 1 minute
-            dpg.set_value("timer_label", f"{elapsed_time:.2f} detik")
+            text = f"{elapsed_time:.2f} detik"
         else:
             # Show in minutes:seconds format if 1 minute or more
             minutes = int(elapsed_time // 60)
             seconds = int(elapsed_time % 60)
-            dpg.set_value("timer_label", f"{minutes:02}:{seconds:02} menit")
+            text = f"{minutes:02}:{seconds:02} menit"
+        # The minutes format only changes once per second; skip identical writes
+        if text != last_text:
+            dpg.set_value("timer_label", text)
+            last_text = text
         time.sleep(0.1)  # Update every 0.1 seconds
 
-def setup_database(script_dir):
-    if not os.path.exists('database.db'):
+def queue_log(log_id, line):
+    with log_lock:
+        lines = log_buffers.setdefault(log_id, deque(maxlen=ACTIVITY_LOG_MAX_LINES))
+        lines.appendleft(line)  # Newest entry on top
+    # Keep buffering while the progress popup is closed; nothing would be drawn anyway
+    if not dpg.is_item_shown("progress_popup"):
+        return
+    if time.monotonic() - last_log_flush.get(log_id, 0) >= LOG_FLUSH_INTERVAL:
+        flush_log(log_id)
+    elif log_id not in log_flush_pending:
+        # Arm a trailing flush so the tail of a burst is not held back until the next line
+        log_flush_pending.add(log_id)
+        timer = threading.Timer(LOG_FLUSH_INTERVAL, flush_log, args=(log_id,))
+        timer.daemon = True
+        timer.start()
+
+def flush_log(log_id):
+    log_flush_pending.discard(log_id)
+    last_log_flush[log_id] = time.monotonic()
+    with log_lock:
+        text = "\n".join(log_buffers.get(log_id, ()))
+    dpg.set_value(log_id, text)
+
+def show_progress_popup():
+    dpg.show_item("progress_popup")
+    # Drain lines that were buffered while the popup was hidden
+    with log_lock:
+        log_ids = list(log_buffers)
+    for log_id in log_ids:
+        flush_log(log_id)
+
+def clear_log(log_id):
+    with log_lock:
+        log_buffers.pop(log_id, None)
+    dpg.set_value(log_id, "")
+
+def setup_database():
+    if not os.path.exists(db_path):
         setup_window = dpg.add_window(label="Database Setup", modal=True, width=300, height=100, pos=(250, 250))
         dpg.add_text("Setting up database...", parent=setup_window)
         dpg.add_loading_indicator(parent=setup_window)
            
         try:
-            subprocess.run([sys.executable, os.path.join(script_dir, "setup_database.py")], check=True)
+            create_database()  # Runs in-process instead of spawning a second interpreter
             dpg.delete_item(setup_window)  # Close the setup window
            
             # Show success message
@@ -56,33 +130,34 @@ def setup_database(script_dir):
                
             threading.Thread(target=close_success_window, daemon=True).start()
             
-        except subprocess.CalledProcessError as e:
+        except (sqlite3.Error, OSError) as e:  # OSError: model folder unreadable
             dpg.delete_item(setup_window)
             error_window = dpg.add_window(label="Error", modal=True, width=300, height=100, pos=(250, 250))
-            dpg.add_text(f"Error running setup_database.py: {e}", parent=error_window)
+            dpg.add_text(f"Error setting up database: {e}", parent=error_window)
             dpg.add_button(label="Exit", callback=lambda: sys.exit(1), parent=error_window)
 
+db_conn = None
+
+def get_db_connection():
+    # Open the database once and reuse the connection for every load/save
+    global db_conn
+    if db_conn is None:
+        db_conn = sqlite3.connect(db_path, check_same_thread=False)
+        # WAL persists in the file (a no-op once set), so this also converts
+        # databases created before setup enabled it
+        journal_mode = db_conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+        if journal_mode == "wal":
+            db_conn.execute("PRAGMA synchronous = NORMAL")  # Per-connection; safe with WAL
+        atexit.register(db_conn.close)
+    return db_conn
+
 def load_config_from_db():
-    conn = sqlite3.connect('database.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM configuration ORDER BY id DESC LIMIT 1')
+    cursor = get_db_connection().cursor()
+    cursor.execute(LOAD_CONFIG_SQL)
     row = cursor.fetchone()
-    conn.close()
     
-    # dapat dilihat untuk urutan di file setup_database.py
-    config = {
-        "model": row[1],
-        "imgsz": row[2],
-        "iou": row[3],
-        "conf": row[4],
-        "convert_shp": row[5],
-        "convert_kml": row[6],
-        "max_det": row[7],
-        "line_width": row[8],
-        "show_labels": row[9],
-        "show_conf": row[10],
-        "status_blok": row[11]
-    }
+    # Urutan kolom mengikuti CONFIG_COLUMNS yang disebut di LOAD_CONFIG_SQL
+    config = dict(zip(CONFIG_COLUMNS, row))
     return config
 
 dpg.create_context()
@@ -114,35 +189,35 @@ with dpg.theme() as blue_button_theme:
         dpg.add_theme_color(dpg.mvThemeCol_ButtonHovered, (0, 150, 200))
         dpg.add_theme_color(dpg.mvThemeCol_ButtonActive, (0, 50, 100))
 
-script_dir = os.path.dirname(os.path.abspath(__file__))
-setup_database(script_dir)
+setup_database()
 config = load_config_from_db()
 
-
-def get_model_names():
-    global model_folder
-    # Get absolute path of script directory regardless of where it's run from
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    model_folder = os.path.join(script_dir, "model")  # Path to your model folder
-    if os.path.exists(model_folder):
-        model_files = [f for f in os.listdir(model_folder) if f.endswith('.pt')]
-        model_names = [os.path.splitext(f)[0] for f in model_files]  # Remove the extension
-        return model_names
-    return []
-
 # Call the function to get model names
 model_names = get_model_names()
 
+def folder_has_tiff(folder_path):
+    # Only positive results are cached: a "no .tif" answer is always rescanned, since
+    # mtime is not a reliable change signal on FAT/exFAT drives and some network shares
+    mtime = os.stat(folder_path).st_mtime_ns
+    if folder_scan_cache.get(folder_path) == mtime:
+        return True
+    # scandir streams entries, so any() stops reading the folder at the first match
+    with os.scandir(folder_path) as entries:
+        has_tiff_files = any(entry.name.endswith('.tif') for entry in entries)
+    if has_tiff_files:
+        folder_scan_cache[folder_path] = mtime
+    else:
+        folder_scan_cache.pop(folder_path, None)
+    return has_tiff_files
+
 def folder_callback(sender, app_data, user_data):
     global folder_path_id, select_folder_button_id, convert_button_id
     folder_path = app_data['current_path']  # Get only the current_path
 
-
-    print(folder_path)
+    log.debug("Selected folder: %s", folder_path)
 
     # Check if the folder contains any .tif files
-    has_tiff_files = any(f.endswith('.tif') for f in os.listdir(folder_path))
+    has_tiff_files = folder_has_tiff(folder_path)
 
     if has_tiff_files:
         dpg.set_value(folder_path_id, f"Selected Folder: {folder_path}")
@@ -160,7 +235,7 @@ def folder_callback(sender, app_data, user_data):
 def convert_to_shp_callback(sender, app_data, user_data):
     # Show the progress popup window
     global timer_running, start_time
-    dpg.show_item("progress_popup")
+    show_progress_popup()
 
     # Show annotated progress section if checkbox is checked
     if dpg.get_value("save_annotated_checkbox"):
@@ -171,7 +246,7 @@ def convert_to_shp_callback(sender, app_data, user_data):
     # Initialize progress bar and activity log
     dpg.set_value(progress_bar_id, 0.0)
     dpg.set_value(progress_text_id, "Starting conversion...")
-    dpg.set_value(activity_log_id, "")
+    clear_log(activity_log_id)
 
      # Start the timer
     timer_running = True
@@ -190,13 +265,10 @@ def run_conversion():
     iou_threshold = dpg.get_value("iou_threshold_slider")
     kml_option = dpg.get_value("kml_checkbox")
     shp_option = dpg.get_value("shp_checkbox")
-    time.sleep(5)
-
-    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "feature_convert_shp.py")
 
     command = [
         sys.executable,
-        script_path,
+        convert_script_path,
         "--folder", folder_path,
         "--weights", model_weights,
         "--conf", str(conf_threshold),
@@ -208,11 +280,11 @@ def run_conversion():
     if shp_option:
         command.append("--shp")
 
-    command_str = " ".join(command)
-    print(f"Executing command: {command_str}")
+    log.debug("Executing command: %s", command)
 
-
-    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    # stdout carries only the JSON progress lines; tqdm's stderr bar has no newlines
+    # and would corrupt them if merged, so discard it (an unread PIPE can deadlock)
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
 
     while True:
         output = process.stdout.readline()
@@ -250,14 +322,16 @@ def run_conversion():
                 dpg.set_value(progress_bar_id, progress)
                 dpg.set_value(progress_text_id, f"{processed} of {total_file_tiff} images processed")
         
-                dpg.set_value(activity_log_id, f"{current_file} - {abnormal_count} abnormal, {normal_count} normal - {status}\n" + dpg.get_value(activity_log_id))
+                queue_log(activity_log_id, f"{current_file} - {abnormal_count} abnormal, {normal_count} normal - {status}")
 
             except json.JSONDecodeError:
                 pass
 
+    flush_log(activity_log_id)  # Make sure the last lines reach the widget
+
     if save_annotated:
         command_annotate = [
-            "python", "feature_save_annotated_file.py",
+            sys.executable, annotate_script_path,
             "--folder", folder_path,
             "--weights", model_weights,
             "--conf", str(conf_threshold),
@@ -266,14 +340,13 @@ def run_conversion():
             "--line-width", str(dpg.get_value("line_width_input")),
         ]
 
-        print(folder_path)
-        print(model_weights)
+        log.debug("Saving annotated images from %s with %s", folder_path, model_weights)
         if dpg.get_value("show_labels_checkbox"):
             command_annotate.append("--show-labels")
         if dpg.get_value("show_conf_checkbox"):
             command_annotate.append("--show-conf")
 
-        process_annotate = subprocess.Popen(command_annotate, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        process_annotate = subprocess.Popen(command_annotate, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
 
         while True:
             output = process_annotate.stdout.readline()
@@ -284,11 +357,13 @@ def run_conversion():
                     json_output = json.loads(output)
                     processed = json_output.get("processed", 0)
 
-                    print(processed)
-                    dpg.set_value(annotated_progress_bar_id, processed / total_file_tiff)
-                    dpg.set_value(annotated_progress_text_id, f"Saving Annotated: {processed} of {total_file_tiff} images processed")
+                    log.debug("Annotated processed: %s", processed)
+                    dpg.set_value("annotated_progress_bar_id", processed / total_file_tiff)
+                    dpg.set_value("annotated_progress_text_id", f"Saving Annotated: {processed} of {total_file_tiff} images processed")
                 except json.JSONDecodeError:
-                    dpg.set_value(annotated_activity_log_id, f"{output.strip()}\n" + dpg.get_value(annotated_activity_log_id))
+                    queue_log("annotated_activity_log_id", output.strip())
+
+        flush_log("annotated_activity_log_id")
 
     countdown(3, folder_path)
     
@@ -353,23 +428,11 @@ def save_configuration():
         "status_blok": dpg.get_value("status_blok")
     }
     
-    conn = sqlite3.connect('database.db')
+    conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        cursor.execute('''
-            INSERT INTO configuration (
-                model, imgsz, iou, conf, convert_shp, convert_kml,
-                max_det, line_width, show_labels, show_conf, status_blok
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            config_to_save["model"], config_to_save["imgsz"], 
-            config_to_save["iou"], config_to_save["conf"],
-            config_to_save["convert_shp"], config_to_save["convert_kml"],
-            config_to_save["max_det"], config_to_save["line_width"],
-            config_to_save["show_labels"], config_to_save["show_conf"],
-            config_to_save["status_blok"]
-        ))
+        cursor.execute(SAVE_CONFIG_SQL, tuple(config_to_save[column] for column in CONFIG_COLUMNS))
         
         conn.commit()
         dpg.show_item("save_message")
@@ -383,10 +446,9 @@ def save_configuration():
         threading.Thread(target=countdown_message, daemon=True).start()
         
     except Exception as e:
+        conn.rollback()  # Leave the shared connection without a pending transaction
         dpg.set_value("save_message", f"Error saving configuration: {str(e)}")
         dpg.show_item("save_message")
-    
-    conn.close()
 
 
 def countdown(seconds, folder_path):
@@ -400,18 +462,17 @@ def countdown(seconds, folder_path):
     dpg.hide_item("progress_popup")
 
     # Show completion message above the "Convert to SHP" button
-    dpg.set_value(conversion_message_id, f"The folder '{os.path.basename(folder_path)}' has been converted successfully.")
+    folder_name = os.path.basename(folder_path)
+    dpg.set_value(conversion_message_id, f"The folder '{folder_name}' has been converted successfully.")
     dpg.show_item(conversion_message_id)
 
     dpg.show_item("result_button")  # Show the result button
 
     for i in range(4, 0, -1):
-        dpg.set_value(conversion_message_id, f"The folder '{os.path.basename(folder_path)}' has been converted successfully. This message will disappear in {i}...")
+        dpg.set_value(conversion_message_id, f"The folder '{folder_name}' has been converted successfully. This message will disappear in {i}...")
         time.sleep(1)
     dpg.hide_item(conversion_message_id)
 
-current_dir = os.path.dirname(os.path.abspath(__file__))
-
 # Modified file dialog with default_path set to current directory
 with dpg.file_dialog(
     directory_selector=True, 
@@ -420,7 +481,7 @@ with dpg.file_dialog(
     id="folder_dialog_id", 
     width=700, 
     height=400,
-    default_path=current_dir  # Set default path to current directory
+    default_path=script_dir  # Set default path to the app directory
 ):
     dpg.add_file_extension("", color=(150, 255, 150, 255))
 
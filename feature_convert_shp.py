@@ -5,9 +5,7 @@ import argparse
 import time
 from ultralytics import YOLO
 from tqdm import tqdm
-from fastkml import kml, geometry
 import json
-import geopandas as gpd
 import sys  # Import sys to use flush
 # Step 1: Object Detection with YOLO
 def load_yolo_model(weights_path):
@@ -22,13 +20,10 @@ def detect_objects(image_path, model, imgsz, conf, iou, classes=None):
     normal_count = 0
 
     for result in results:
-        for detection in result.boxes:
-            class_id = int(detection.cls)
-            if class_id == 0:  # Assuming class 0 is abnormal
-                abnormal_count += 1
-            elif class_id == 1:  # Assuming class 1 is normal
-                
-                normal_count += 1
+        # Count on the whole class tensor at once instead of one Boxes object per detection
+        class_ids = result.boxes.cls
+        abnormal_count += int((class_ids == 0).sum())  # Assuming class 0 is abnormal
+        normal_count += int((class_ids == 1).sum())  # Assuming class 1 is normal
     
     progress = {
         "abnormal_count": abnormal_count,
@@ -53,12 +48,14 @@ def create_geojson(detected_objects, jgw_params, labels):
     pixel_size_x, rotation_x, rotation_y, pixel_size_y, upper_left_x, upper_left_y = jgw_params
     features = []
     for result in detected_objects:
-        for detection in result.boxes:
-            x1, y1, x2, y2 = detection.xyxy[0].cpu().numpy()  # Convert to CPU and NumPy
+        # Move all boxes and classes to the CPU in one transfer instead of one per detection
+        boxes = result.boxes.xyxy.cpu().numpy()
+        class_ids = result.boxes.cls.cpu().numpy().astype(int)
+        for (x1, y1, x2, y2), class_id in zip(boxes, class_ids):
             center_x, center_y = (x1 + x2) / 2, (y1 + y2) / 2
             map_x, map_y = image_to_map_coords(center_x, center_y, pixel_size_x, pixel_size_y, upper_left_x, upper_left_y)
             point = Point(map_x, map_y)
-            feature = geojson.Feature(geometry=mapping(point), properties={"label": labels[int(detection.cls)]})
+            feature = geojson.Feature(geometry=mapping(point), properties={"label": labels[class_id]})
             features.append(feature)
     return geojson.FeatureCollection(features)
 
@@ -72,12 +69,16 @@ def save_geojson(feature_collection, input_image_path):
         output_path = os.path.join(os.path.dirname(input_image_path), f"{base_name}_{counter}.geojson")
         counter += 1
     
-    with open(output_path, "w") as f:
-        geojson.dump(feature_collection, f)
+    # Serialize and encode once; geojson.dump would issue one write per JSON chunk
+    data = geojson.dumps(feature_collection).encode("utf-8")
+    with open(output_path, "wb") as f:
+        f.write(data)
     return output_path
 
 # Step 5: Convert GeoJSON to KML
 def convert_geojson_to_kml(geojson_path, kml_path):
+    from fastkml import kml, geometry  # Only needed with --kml
+
     with open(geojson_path, 'r') as f:
         geojson_data = json.load(f)
 
@@ -95,11 +96,14 @@ def convert_geojson_to_kml(geojson_path, kml_path):
         p.geometry = geometry.Point(coords[0], coords[1])
         d.append(p)
 
-    with open(kml_path, 'w') as f:
-        f.write(k.to_string(prettyprint=True))
+    data = k.to_string(prettyprint=True).encode('utf-8')
+    with open(kml_path, 'wb') as f:
+        f.write(data)
 
 # Step 6: Convert GeoJSON to SHP
 def convert_geojson_to_shp(geojson_path, shp_path):
+    import geopandas as gpd  # Heavy import, only needed with --shp
+
     gdf = gpd.read_file(geojson_path)
     gdf.to_file(shp_path, driver='ESRI Shapefile')
 
@@ -130,12 +134,16 @@ if __name__ == "__main__":
 
     start_time = time.time()
 
-    processing_times = []
+    total_processing_time = 0.0  # Running sum, so the average is O(1) per image
 
     model = load_yolo_model(args.weights)
+    labels = model.names  # Get labels directly from the YOLO model, once per run
     # total_files = len(image_files)
     # Loop over all images in the folder
-    image_files = [f for f in os.listdir(args.folder) if f.endswith(('.png', '.jpg', '.jpeg', '.tif', '.tiff'))]
+    image_extensions = ('.png', '.jpg', '.jpeg', '.tif', '.tiff')
+    with os.scandir(args.folder) as entries:
+        image_files = [entry.name for entry in entries
+                       if entry.name.endswith(image_extensions) and entry.is_file()]
     total_files = len(image_files)
 
     for index, image_file in enumerate(tqdm(image_files, desc="Processing images")):
@@ -152,7 +160,6 @@ if __name__ == "__main__":
         jgw_params = read_jgw(jgw_file)
         
         # Create GeoJSON
-        labels = model.names  # Get labels directly from the YOLO model
         feature_collection = create_geojson(detected_objects, jgw_params, labels)
         
         # Save GeoJSON
@@ -175,8 +182,8 @@ if __name__ == "__main__":
         
         current_time = time.time()
         iteration_time = current_time - start_time
-        processing_times.append(iteration_time)
-        avg_time = sum(processing_times) / len(processing_times)
+        total_processing_time += iteration_time
+        avg_time = total_processing_time / (index + 1)
        
         progress = {
             
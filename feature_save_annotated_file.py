@@ -4,7 +4,6 @@ import os
 from pathlib import Path
 import time
 import json
-import sys
 
 def parse_args():
     parser = argparse.ArgumentParser(description='YOLO detection with custom parameters')
@@ -57,7 +56,6 @@ def main():
             "avg_time_per_file": avg_time
         }
         print(json.dumps(progress_info), flush=True)
-        sys.stdout.flush()
 
 if __name__ == '__main__':
     main()
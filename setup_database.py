@@ -1,21 +1,26 @@
 import sqlite3
-import requests
-import json
 import os
+from functools import lru_cache
 
+# Resolved once at import; the database and models live next to this script
+script_dir = os.path.dirname(os.path.abspath(__file__))
+db_path = os.path.join(script_dir, "database.db")
+model_folder = os.path.join(script_dir, "model")
+
+@lru_cache(maxsize=1)
 def get_model_names():
-    model_folder = os.path.join(os.getcwd(), "model")
-    if os.path.exists(model_folder):
-        model_files = [f for f in os.listdir(model_folder) if f.endswith('.pt')]
-        model_names = [os.path.splitext(f)[0] for f in model_files]
-        return model_names
-    return []
+    # Cached: the app and create_database() both ask for the list on first launch
+    try:
+        with os.scandir(model_folder) as entries:
+            # Single pass; slicing off the known ".pt" suffix replaces splitext
+            return tuple(entry.name[:-3] for entry in entries
+                         if entry.name.endswith('.pt') and entry.is_file())
+    except FileNotFoundError:
+        return ()
 
 def create_database():
-    conn = sqlite3.connect('database.db')
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    
-    cursor.execute("PRAGMA foreign_keys = ON")
 
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS configuration (